@@ -1,18 +1,25 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory
 from flask_cors import CORS
 import os
 import tempfile
 import pandas as pd
 import json
+import orjson
 import traceback
+import threading
+import uuid
+from cachetools import TTLCache
 from werkzeug.utils import secure_filename
 
 
-from input_handler import handle_input_files, cleanup_temp_files
-from ocr_extractor import DocumentExtractor
-from data_structurer import DataStructurer
-from validator import TermValidator
-from reporter import ValidationReporter
+from input_handler import handle_input_files, handle_batch_input_files, cleanup_temp_files
+from pipeline import run_validation, df_to_records, summarize_results, DOC_EXTRACTOR, DATA_STRUCTURER, VALIDATOR
+
+# Celery is optional, the async endpoints are disabled without it
+try:
+    from tasks import validate_task
+except ImportError:
+    validate_task = None
 
 REACT_BUILD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend', 'build')
 
@@ -25,6 +32,28 @@ UPLOAD_FOLDER = tempfile.gettempdir()
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
 
+# Generated report paths by report id, so each user downloads their own reports
+REPORTS = TTLCache(maxsize=1024, ttl=3600)
+REPORTS_LOCK = threading.Lock()
+
+def register_reports(report_files: dict, report_id: str = None) -> str:
+    """Store report file paths for the download endpoint and return their id."""
+    report_id = report_id or uuid.uuid4().hex
+    with REPORTS_LOCK:
+        REPORTS[report_id] = report_files
+    return report_id
+
+def _json_default(obj):
+    # pandas Timestamps (and other datetime subclasses) aren't handled natively by orjson
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def json_response(data) -> Response:
+    """Serialize a large response body with orjson, which is much faster than jsonify."""
+    body = orjson.dumps(data, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return Response(body, mimetype='application/json')
+
 @app.before_request
 def log_request_info():
     app.logger.debug('Headers: %s', request.headers)
@@ -69,88 +98,155 @@ def validate_termsheet():
             app.logger.error(f"Unexpected error processing files: {str(e)}")
             return jsonify({'error': f"Error processing files: {str(e)}"}), 500
         
+        try:
+            response, report_files = run_validation(term_sheet_info, master_sheet_info)
+            
+            # Store file paths for download endpoints
+            response['reportId'] = register_reports(report_files)
+            
+            return json_response(response)
+        finally:
+            # The uploads are only needed while the request is being processed
+            cleanup_temp_files([term_sheet_info['path'], master_sheet_info['path']])
+        
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/validate-async', methods=['POST'])
+def validate_termsheet_async():
+    try:
+        if validate_task is None:
+            return jsonify({'error': 'Background validation is not available'}), 503
+        
+        # Check if both files are present in the request
+        if 'termsheet' not in request.files or 'mastersheet' not in request.files:
+            app.logger.error("Missing required files")
+            return jsonify({'error': 'Both term sheet and master sheet files are required'}), 400
+        
+        term_sheet = request.files['termsheet']
+        master_sheet = request.files['mastersheet']
+        
+        # Check if files are empty
+        if term_sheet.filename == '' or master_sheet.filename == '':
+            app.logger.error("Empty filenames")
+            return jsonify({'error': 'File names cannot be empty'}), 400
+        
+        # Save the files here, the worker picks them up from disk and removes them
+        try:
+            term_sheet_info, master_sheet_info = handle_input_files(term_sheet, master_sheet)
+        except ValueError as e:
+            app.logger.error(f"Error processing files: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            task = validate_task.delay(term_sheet_info, master_sheet_info)
+        except Exception as e:
+            # The task was never queued (e.g. the broker is down), so no worker will remove the uploads
+            app.logger.error(f"Error queueing validation task: {str(e)}")
+            cleanup_temp_files([term_sheet_info['path'], master_sheet_info['path']])
+            raise
+        app.logger.info(f"Queued validation task {task.id}")
+        
+        return jsonify({'taskId': task.id}), 202
+        
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/result/<task_id>', methods=['GET'])
+def validation_result(task_id):
+    try:
+        if validate_task is None:
+            return jsonify({'error': 'Background validation is not available'}), 503
+        
+        result = validate_task.AsyncResult(task_id)
+        if not result.ready():
+            return jsonify({'taskId': task_id, 'status': result.state}), 202
+        if result.failed():
+            return jsonify({'taskId': task_id, 'status': result.state, 'error': str(result.result)}), 500
+        
+        # Store file paths for download endpoints, under the task id so polling
+        # again doesn't register them twice
+        response = result.result['response']
+        response['reportId'] = register_reports(result.result['reportFiles'], task_id)
+        
+        return json_response(response)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/validate-batch', methods=['POST'])
+def validate_termsheet_batch():
+    try:
+        # Check if the term sheets and master sheet are present in the request
+        term_sheets = request.files.getlist('termsheets')
+        if not term_sheets or 'mastersheet' not in request.files:
+            app.logger.error("Missing required files")
+            return jsonify({'error': 'At least one term sheet and a master sheet file are required'}), 400
+        
+        master_sheet = request.files['mastersheet']
+        
+        # Check if files are empty
+        if master_sheet.filename == '' or any(term_sheet.filename == '' for term_sheet in term_sheets):
+            app.logger.error("Empty filenames")
+            return jsonify({'error': 'File names cannot be empty'}), 400
+        
+        app.logger.info(f"Received {len(term_sheets)} term sheets and master sheet: {master_sheet.filename}")
+        
         # Process the uploaded files
-        term_sheet_info, master_sheet_info = handle_input_files(term_sheet, master_sheet)
-        
-        # Extract text from the documents
-        doc_extractor = DocumentExtractor()
-        term_sheet_text = doc_extractor.extract_text(term_sheet_info)
-        master_df = doc_extractor.extract_master_sheet_structure(master_sheet_info)
-        
-        # Structure the extracted term sheet data
-        data_structurer = DataStructurer()
-        extracted_terms = data_structurer.structure_data(term_sheet_text)
-        
-        # Normalize terms to match master sheet terminology
-        normalized_terms = data_structurer.normalize_terms(extracted_terms, master_df)
-        
-        # Validate terms against master sheet
-        validator = TermValidator()
-        validation_results = validator.validate_terms(normalized_terms, master_df)
-        
-        # Convert DataFrame to JSON
-        master_sheet_json = master_df.to_dict(orient='records')
-        validation_results_json = validation_results.to_dict(orient='records')
-        
-        # Generate reports
-        reporter = ValidationReporter()
-        
-        # HTML report
-        html_report = reporter.generate_html_report(validation_results, term_sheet_info, master_sheet_info)
-        
-        # Generate PDF and Excel reports
-        pdf_path = reporter.generate_pdf_report(validation_results, term_sheet_info, master_sheet_info)
-        excel_path = reporter.generate_excel_report(validation_results, term_sheet_info, master_sheet_info)
-
-        # Calculate summary statistics
-        total_terms = len(validation_results)
-        valid_terms = len(validation_results[validation_results['Status'] == '✅'])
-        invalid_terms = len(validation_results[validation_results['Status'] == '❌'])
-        unknown_terms = len(validation_results[validation_results['Status'] == '❓'])
-        
-        # Return results
-        response = {
-            'success': True,
-            'masterSheetData': master_sheet_json,
-            'extractedTerms': extracted_terms,
-            'validationResults': validation_results_json,
-            'summary': {
-                'totalTerms': total_terms,
-                'validTerms': valid_terms,
-                'invalidTerms': invalid_terms,
-                'unknownTerms': unknown_terms,
-                'validPercent': (valid_terms/total_terms*100) if total_terms > 0 else 0,
-                'invalidPercent': (invalid_terms/total_terms*100) if total_terms > 0 else 0,
-                'unknownPercent': (unknown_terms/total_terms*100) if total_terms > 0 else 0
-            },
-            'extractedText': term_sheet_text[:5000] + ("..." if len(term_sheet_text) > 5000 else ""),
-            'pdfReport': os.path.basename(pdf_path),
-            'excelReport': os.path.basename(excel_path),
-            'htmlReport': html_report
-        }
-        
-        # Store file paths for download endpoints
-        app.config['REPORT_FILES'] = {
-            'pdf': pdf_path,
-            'excel': excel_path
-        }
-        
-        return jsonify(response)
+        try:
+            term_sheet_infos, master_sheet_info = handle_batch_input_files(term_sheets, master_sheet)
+        except ValueError as e:
+            app.logger.error(f"Error processing files: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            app.logger.error(f"Unexpected error processing files: {str(e)}")
+            return jsonify({'error': f"Error processing files: {str(e)}"}), 500
+        
+        try:
+            # Extract text from the documents
+            term_sheet_texts = [DOC_EXTRACTOR.extract_text(info) for info in term_sheet_infos]
+            master_df = DOC_EXTRACTOR.extract_master_sheet_structure(master_sheet_info)
+            
+            # Structure all term sheets together so the NER passes are batched
+            all_extracted_terms = DATA_STRUCTURER.structure_data_batch(term_sheet_texts)
+            
+            results = []
+            for info, extracted_terms in zip(term_sheet_infos, all_extracted_terms):
+                normalized_terms = DATA_STRUCTURER.normalize_terms(extracted_terms, master_df)
+                validation_results = VALIDATOR.validate_terms(normalized_terms, master_df)
+                results.append({
+                    'filename': info['filename'],
+                    'extractedTerms': extracted_terms,
+                    'validationResults': df_to_records(validation_results),
+                    'summary': summarize_results(validation_results)
+                })
+            
+            return json_response({
+                'success': True,
+                'masterSheetData': df_to_records(master_df),
+                'results': results
+            })
+        finally:
+            cleanup_temp_files([info['path'] for info in term_sheet_infos] + [master_sheet_info['path']])
         
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
-@app.route('/api/download/<report_type>', methods=['GET'])
-def download_report(report_type):
+@app.route('/api/download/<report_id>/<report_type>', methods=['GET'])
+def download_report(report_id, report_type):
     try:
         if report_type not in ['pdf', 'excel']:
             return jsonify({'error': 'Invalid report type'}), 400
             
-        if 'REPORT_FILES' not in app.config or report_type not in app.config['REPORT_FILES']:
+        with REPORTS_LOCK:
+            report_files = REPORTS.get(report_id)
+        if report_files is None or report_type not in report_files:
             return jsonify({'error': 'Report not found'}), 404
             
-        report_path = app.config['REPORT_FILES'][report_type]
+        report_path = report_files[report_type]
         
         if not os.path.exists(report_path):
             return jsonify({'error': 'Report file not found'}), 404
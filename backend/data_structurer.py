@@ -1,19 +1,85 @@
 import spacy
 import re
-from typing import Dict, Any, List, Optional
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Dict, Any, List, Optional, Tuple
 import pandas as pd
 import dateparser
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz, process
+
+# Only the NER component is used, so skip the rest of the pipeline
+_DISABLED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+
+def _load_nlp():
+    try:
+        return spacy.load("en_core_web_sm", disable=_DISABLED_PIPES)
+    except:
+        # Download the model if not present
+        import os
+        os.system("python -m spacy download en_core_web_sm")
+        return spacy.load("en_core_web_sm", disable=_DISABLED_PIPES)
+
+# Load the model once per process instead of once per DataStructurer
+_NLP = _load_nlp()
+
+# Context keywords that must precede an entity for the NER fallbacks to use it
+_NER_KEYWORDS = {
+    'maturity_date': ["maturity", "matures", "due"],
+    'interest_rate': ["interest", "rate", "coupon"],
+    'principal': ["principal", "amount"],
+}
+
+# Where the NER window may start: whole-word keyword hits, matched on the original
+# text so the offsets line up ("rate" in "corporate" doesn't count)
+_NER_KEYWORD_PATTERNS = {
+    key: re.compile(r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b', re.IGNORECASE)
+    for key, words in _NER_KEYWORDS.items()
+}
+
+# Only run NER on this much text after the relevant keywords
+_NER_WINDOW = 2048
+
+# NER never looks past this much of the text
+_NER_MAX_CHARS = 100000
+
+# Minimum fuzz.ratio for a "Term: Value" line key to count as a financial term.
+# score_cutoff is inclusive, 65.5 keeps the old "rounded score > 65" rule
+_LINE_MATCH_CUTOFF = 65.5  # Lower threshold (was 80)
+
+# Same for matching extracted terms to master sheet terms, "rounded score > 60"
+_TERM_MATCH_CUTOFF = 60.5  # Lower threshold (was 70)
+
+# The parts of a spaCy entity the NER fallbacks read
+_Entity = namedtuple('_Entity', ['label_', 'text', 'start_char'])
+
+# Small LRU of NER results keyed by a digest of the text, so re-validating the
+# same term sheet doesn't run the model again
+_ENTITY_CACHE_SIZE = 32
+_entity_cache = OrderedDict()
+_entity_cache_lock = threading.Lock()
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+def _get_cached_entities(key: bytes) -> Optional[Tuple[_Entity, ...]]:
+    with _entity_cache_lock:
+        ents = _entity_cache.get(key)
+        if ents is not None:
+            _entity_cache.move_to_end(key)
+        return ents
+
+def _cache_entities(key: bytes, doc) -> Tuple[_Entity, ...]:
+    ents = tuple(_Entity(ent.label_, ent.text, ent.start_char) for ent in doc.ents)
+    with _entity_cache_lock:
+        _entity_cache[key] = ents
+        if len(_entity_cache) > _ENTITY_CACHE_SIZE:
+            _entity_cache.popitem(last=False)
+    return ents
 
 class DataStructurer:
     def __init__(self):
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except:
-            # Download the model if not present
-            import os
-            os.system("python -m spacy download en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+        self.nlp = _NLP
         
         # Expanded list of financial terms for pattern matching
         self.financial_terms = [
@@ -24,6 +90,12 @@ class DataStructurer:
             "pricing", "margin", "fee", "documentation", "security", "covenant",
             "debt", "equity", "currency", "payment date", "repayment", "default"
         ]
+        self._financial_terms_set = set(self.financial_terms)
+        
+        # fuzz.ratio is 200 * matches / (len(a) + len(b)), so a line key longer than
+        # this can't reach the cutoff against any term and needn't be compared
+        longest_term = max(len(term) for term in self.financial_terms)
+        self._max_key_length = int(longest_term * (200 - _LINE_MATCH_CUTOFF) // _LINE_MATCH_CUTOFF)
         
         # Enhanced regex patterns with more flexibility
         self.patterns = {
@@ -36,29 +108,118 @@ class DataStructurer:
             'borrower': re.compile(r'borrower\s*[:=\-]?\s*([a-zA-Z0-9\s\-\.,&]+)', re.IGNORECASE),
             'lender': re.compile(r'lender\s*[:=\-]?\s*([a-zA-Z0-9\s\-\.,&]+)', re.IGNORECASE),
         }
+        
+        # Fuse all field patterns into one alternation so the text is scanned once.
+        # Each alternative sits inside a lookahead so a greedy match for one field
+        # doesn't consume text that another field's pattern would have matched.
+        self._fused = re.compile(
+            '|'.join(f"(?=(?P<{key}>{pattern.pattern}))" for key, pattern in self.patterns.items()),
+            re.IGNORECASE
+        )
     
     def structure_data(self, text: str) -> Dict[str, Any]:
         """
         Process extracted text and structure it into a dictionary of terms.
         Uses regex pattern matching, NLP techniques, and line-by-line analysis.
         """
+        terms = self._match_patterns(text)
+        
+        # Apply NLP processing, only over the text the missing fields can come from
+        self._apply_ner([(text, terms)])
+        
+        self._match_lines(text, terms)
+        
+        print(f"Extracted {len(terms)} terms: {list(terms.keys())}")
+        return terms
+    
+    def structure_data_batch(self, texts: List[str], batch_size: int = 32) -> List[Dict[str, Any]]:
+        """
+        Structure several documents at once. Same output as calling structure_data
+        on each text, but the NER passes are batched through nlp.pipe.
+        """
+        all_terms = [self._match_patterns(text) for text in texts]
+        self._apply_ner(list(zip(texts, all_terms)), batch_size)
+        
+        for text, terms in zip(texts, all_terms):
+            self._match_lines(text, terms)
+            print(f"Extracted {len(terms)} terms: {list(terms.keys())}")
+        
+        return all_terms
+    
+    def _apply_ner(self, documents: List[Tuple[str, Dict[str, Any]]], batch_size: int = 32) -> None:
+        """
+        Fill missing fields of each (text, terms) pair from NER over the text's window.
+        A field the window didn't yield is retried over the whole text, since the
+        window can cut off context the full pass would have seen.
+        """
+        windows = [self._ner_window(text, terms) for text, terms in documents]
+        self._run_ner([(terms, window) for (_, terms), window in zip(documents, windows) if window])
+        
+        retries = []
+        for (text, terms), window in zip(documents, windows):
+            full_text = text[:_NER_MAX_CHARS]
+            if window and window != full_text and self._ner_fields_needed(text, terms):
+                retries.append((terms, full_text))
+        self._run_ner(retries)
+    
+    def _run_ner(self, jobs: List[Tuple[Dict[str, Any], str]], batch_size: int = 32) -> None:
+        """
+        Apply the entities found in each (terms, ner_text) pair. Texts that haven't
+        been seen before go through nlp.pipe together.
+        """
+        pending = []
+        for terms, ner_text in jobs:
+            key = _text_key(ner_text)
+            ents = _get_cached_entities(key)
+            if ents is None:
+                pending.append((terms, ner_text, key))
+            else:
+                self._apply_entities(terms, ner_text, ents)
+        
+        if not pending:
+            return
+        docs = self.nlp.pipe((ner_text for _, ner_text, _ in pending), batch_size=batch_size, n_process=1)
+        for (terms, ner_text, key), doc in zip(pending, docs):
+            self._apply_entities(terms, ner_text, _cache_entities(key, doc))
+    
+    def _match_patterns(self, text: str) -> Dict[str, Any]:
+        """Apply regex pattern matching in a single pass over the text."""
         terms = {}
         
-        # Apply regex pattern matching
-        for key, pattern in self.patterns.items():
-            matches = pattern.finditer(text)
-            for match in matches:  # Get all matches, not just the first one
-                if key not in terms:  # Only keep the first match per key
-                    terms[key] = match.group(1).strip()
+        group_index = self._fused.groupindex
+        for match in self._fused.finditer(text):
+            key = match.lastgroup
+            if key not in terms:  # Only keep the first match per key
+                # The value group directly follows the field's named group
+                terms[key] = match.group(group_index[key] + 1).strip()
+                if len(terms) == len(self.patterns):
+                    break
+        
+        # Matches come in document order; keep the patterns' order like one search per field did
+        return {key: terms[key] for key in self.patterns if key in terms}
+    
+    def _apply_entities(self, terms: Dict[str, Any], ner_text: str, ents) -> None:
+        """Fill fields the regex pass missed from the entities spaCy found in ner_text."""
+        # Lowercase the text once and slice each entity's context out of it.
+        # A few characters change length when lowercased, which would shift the
+        # entity offsets, so fall back to lowercasing per slice for those texts.
+        text_lower = ner_text.lower()
+        if len(text_lower) != len(ner_text):
+            text_lower = None
         
-        # Apply NLP processing
-        doc = self.nlp(text[:100000])  # Limit text size to prevent memory issues
+        def context(ent, width: int) -> str:
+            start = max(0, ent.start_char - width)
+            if text_lower is None:
+                return ner_text[start:ent.start_char].lower()
+            return text_lower[start:ent.start_char]
         
         # Extract dates that weren't caught by regex
         if 'maturity_date' not in terms:
-            for ent in doc.ents:
-                if ent.label_ == "DATE" and any(date_term in text[max(0, ent.start_char-40):ent.start_char].lower() 
-                                             for date_term in ["maturity", "matures", "due"]):
+            for ent in ents:
+                if ent.label_ != "DATE":
+                    continue
+                preceding = context(ent, 40)
+                if any(date_term in preceding for date_term in _NER_KEYWORDS['maturity_date']):
                     date_str = ent.text
                     parsed_date = dateparser.parse(date_str)
                     if parsed_date:
@@ -69,29 +230,32 @@ class DataStructurer:
         
         # Extract percentages that weren't caught by regex
         if 'interest_rate' not in terms:
-            for ent in doc.ents:
-                if ent.label_ == "PERCENT" and any(rate_term in text[max(0, ent.start_char-40):ent.start_char].lower() 
-                                                for rate_term in ["interest", "rate", "coupon"]):
+            for ent in ents:
+                if ent.label_ != "PERCENT":
+                    continue
+                preceding = context(ent, 40)
+                if any(rate_term in preceding for rate_term in _NER_KEYWORDS['interest_rate']):
                     terms['interest_rate'] = ent.text
                     break
         
         # Extract organizations as potential counterparties
         if 'counterparty' not in terms:
-            for ent in doc.ents:
+            for ent in ents:
                 if ent.label_ == "ORG":
                     terms['counterparty'] = ent.text
                     break
                     
         # Extract money amounts that weren't caught
         if 'principal' not in terms and 'loan_amount' not in terms:
-            for ent in doc.ents:
+            for ent in ents:
                 if ent.label_ == "MONEY":
-                    if any(principal_term in text[max(0, ent.start_char-30):ent.start_char].lower() 
-                          for principal_term in ["principal", "amount"]):
+                    preceding = context(ent, 30)
+                    if any(principal_term in preceding for principal_term in _NER_KEYWORDS['principal']):
                         terms['principal'] = ent.text
                     break
-        
-        # Look for terms based on line-by-line analysis (more aggressive approach)
+    
+    def _match_lines(self, text: str, terms: Dict[str, Any]) -> None:
+        """Look for terms based on line-by-line analysis (more aggressive approach)."""
         lines = text.split('\n')
         for line in lines:
             # Check for "Term: Value" or "Term - Value" or "Term = Value" patterns
@@ -106,20 +270,64 @@ class DataStructurer:
                             continue
                             
                         # Direct match with financial terms
-                        if any(term == key for term in self.financial_terms):
+                        if key in self._financial_terms_set:
                             normalized_term = key.replace(' ', '_')
                             terms[normalized_term] = value
                             continue
+                        
+                        # Prose lines that happen to contain a separator can't match
+                        if len(key) > self._max_key_length:
+                            continue
                             
                         # Fuzzy match with lower threshold to catch more terms
-                        for term in self.financial_terms:
-                            if fuzz.ratio(key, term) > 65:  # Lower threshold (was 80)
-                                normalized_term = term.replace(' ', '_')
-                                terms[normalized_term] = value
-                                break
+                        match = process.extractOne(key, self.financial_terms, scorer=fuzz.ratio,
+                                                   score_cutoff=_LINE_MATCH_CUTOFF)
+                        if match:
+                            normalized_term = match[0].replace(' ', '_')
+                            terms[normalized_term] = value
+    
+    def _ner_fields_needed(self, text: str, terms: Dict[str, Any]) -> List[str]:
+        """
+        The keyword-backed fields NER could still fill. A field is only worth
+        looking for when one of its keywords appears somewhere in the text, which
+        is the same substring test _apply_entities makes on an entity's context.
+        """
+        missing = [key for key in ('maturity_date', 'interest_rate') if key not in terms]
+        if 'principal' not in terms and 'loan_amount' not in terms:
+            missing.append('principal')
+        if not missing:
+            return missing
         
-        print(f"Extracted {len(terms)} terms: {list(terms.keys())}")
-        return terms
+        text_lower = text[:_NER_MAX_CHARS].lower()
+        return [key for key in missing if any(term in text_lower for term in _NER_KEYWORDS[key])]
+    
+    def _ner_window(self, text: str, terms: Dict[str, Any]) -> Optional[str]:
+        """
+        Return the slice of text that NER needs to run on to fill the fields the
+        regex pass missed, or None if NER can't add anything.
+        """
+        # Counterparty falls back to the first organisation anywhere in the text
+        if 'counterparty' not in terms:
+            return text[:_NER_MAX_CHARS]  # Limit text size to prevent memory issues
+        
+        missing = self._ner_fields_needed(text, terms)
+        if not missing:
+            return None
+        
+        # The other fallbacks need a keyword before the entity, so start at the
+        # first whole-word keyword and stop shortly after the last one
+        positions = [
+            match.start()
+            for key in missing
+            for match in _NER_KEYWORD_PATTERNS[key].finditer(text, 0, _NER_MAX_CHARS)
+        ]
+        if not positions:
+            # Only found inside other words, which the context check still accepts
+            return text[:_NER_MAX_CHARS]
+        
+        start = min(positions)
+        end = min(max(positions) + _NER_WINDOW, start + _NER_MAX_CHARS)
+        return text[start:end]
     
     def normalize_terms(self, terms: Dict[str, Any], master_df: pd.DataFrame) -> Dict[str, Any]:
         """
@@ -134,14 +342,22 @@ class DataStructurer:
             # Try to guess which column might contain terms
             potential_term_columns = [col for col in master_df.columns if 'term' in col.lower()]
             if potential_term_columns:
-                master_terms = master_df[potential_term_columns[0]].astype(str).str.lower().tolist()
+                term_column = master_df[potential_term_columns[0]]
                 print(f"Using '{potential_term_columns[0]}' as Term column")
             else:
                 # Just use the first column as a fallback
-                master_terms = master_df.iloc[:, 0].astype(str).str.lower().tolist()
+                term_column = master_df.iloc[:, 0]
                 print(f"Using first column '{master_df.columns[0]}' as Term column")
         else:
-            master_terms = master_df['Term'].astype(str).str.lower().tolist()
+            term_column = master_df['Term']
+        
+        original_terms = term_column.astype(str).tolist()
+        master_terms = [term.lower() for term in original_terms]
+        
+        # Map each lowercased term back to the first original-case spelling
+        lower_to_original = {}
+        for lower_term, original_term in zip(master_terms, original_terms):
+            lower_to_original.setdefault(lower_term, original_term)
         
         print(f"Master sheet terms: {master_terms}")
         
@@ -150,32 +366,25 @@ class DataStructurer:
             display_key = key.replace('_', ' ')
             
             # Try exact match first (case insensitive)
-            if display_key.lower() in master_terms:
+            if display_key.lower() in lower_to_original:
                 # Get the original case from master_df
-                original_case_term = master_df[master_df['Term'].str.lower() == display_key.lower()]['Term'].iloc[0]
-                normalized_terms[original_case_term] = value
+                normalized_terms[lower_to_original[display_key.lower()]] = value
                 continue
             
             # Then try fuzzy matching with a lower threshold
             best_match = None
             best_score = 0
             
-            for master_term in master_terms:
-                score = fuzz.ratio(display_key.lower(), master_term.lower())
-                if score > best_score and score > 60:  # Lower threshold (was 70)
-                    best_score = score
-                    best_match = master_term
+            match = process.extractOne(display_key.lower(), master_terms, scorer=fuzz.ratio,
+                                       score_cutoff=_TERM_MATCH_CUTOFF)
+            if match:
+                best_match, best_score = match[0], round(match[1])
             
             if best_match:
                 # Get the original case from master_df
-                original_case_terms = master_df[master_df['Term'].str.lower() == best_match]['Term']
-                if not original_case_terms.empty:
-                    original_case_term = original_case_terms.iloc[0]
-                    normalized_terms[original_case_term] = value
-                    print(f"Matched '{display_key}' to '{original_case_term}' with score {best_score}")
-                else:
-                    normalized_terms[best_match.title()] = value
-                    print(f"Matched '{display_key}' to '{best_match.title()}' with score {best_score}")
+                original_case_term = lower_to_original[best_match]
+                normalized_terms[original_case_term] = value
+                print(f"Matched '{display_key}' to '{original_case_term}' with score {best_score}")
             else:
                 # Keep the original term if no good match
                 normalized_terms[display_key.title()] = value
@@ -2,8 +2,9 @@ import os
 import pandas as pd
 import docx
 import PyPDF2
-from typing import Dict, Any, Tuple, BinaryIO, Optional
+from typing import Dict, Any, List, Tuple, BinaryIO, Optional
 import tempfile
+import shutil
 import mimetypes
 import logging
 
@@ -144,49 +145,80 @@ def save_uploaded_file(file_obj: BinaryIO) -> str:
     base_name = os.path.basename(filename)
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(base_name)[1])
     
-    # Read and write the file content
-    temp_file.write(file_obj.read())
-    temp_file.close()
+    # Stream the file content to disk in chunks rather than reading it all into memory
+    try:
+        with temp_file:
+            if hasattr(file_obj, 'save'):
+                # Werkzeug FileStorage copies its stream in buffered chunks
+                file_obj.save(temp_file)
+            else:
+                shutil.copyfileobj(file_obj, temp_file, 1024 * 1024)
+    except Exception:
+        # Remove the partial file, the caller never gets its path
+        cleanup_temp_files([temp_file.name])
+        raise
     
     logger.debug(f"Saved file to {temp_file.name}")
     return temp_file.name
 
+def handle_input_file(file_obj: BinaryIO, label: str) -> Dict[str, Any]:
+    """
+    Save one uploaded file and detect its type.
+    Returns metadata about the file including the path and file type.
+    """
+    # Log file information for debugging
+    filename = getattr(file_obj, 'filename', None) or getattr(file_obj, 'name', 'Unknown')
+    logger.debug(f"Processing {label}: {filename}")
+    
+    # Save the file first, then detect type (more reliable)
+    path = save_uploaded_file(file_obj)
+    try:
+        file_obj.seek(0)  # Reset file position for type detection
+        
+        file_info = {
+            'type': detect_file_type(file_obj),
+            'path': path,
+            'filename': filename
+        }
+    except Exception:
+        cleanup_temp_files([path])
+        raise
+    
+    logger.debug(f"{label.capitalize()} info: {file_info}")
+    return file_info
+
 def handle_input_files(term_sheet: BinaryIO, master_sheet: BinaryIO) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """
     Process uploaded term sheet and master sheet files.
     Returns metadata about each file including the path and file type.
     """
-    # Log file information for debugging
-    term_sheet_filename = getattr(term_sheet, 'filename', None) or getattr(term_sheet, 'name', 'Unknown')
-    master_sheet_filename = getattr(master_sheet, 'filename', None) or getattr(master_sheet, 'name', 'Unknown')
-    
-    logger.debug(f"Processing term sheet: {term_sheet_filename}")
-    logger.debug(f"Processing master sheet: {master_sheet_filename}")
-    
-    # Save files first, then detect type (more reliable)
-    term_sheet_path = save_uploaded_file(term_sheet)
-    term_sheet.seek(0)  # Reset file position for type detection
-    
-    master_sheet_path = save_uploaded_file(master_sheet)
-    master_sheet.seek(0)  # Reset file position for type detection
-    
-    term_sheet_info = {
-        'type': detect_file_type(term_sheet),
-        'path': term_sheet_path,
-        'filename': term_sheet_filename
-    }
-    
-    master_sheet_info = {
-        'type': detect_file_type(master_sheet),
-        'path': master_sheet_path,
-        'filename': master_sheet_filename
-    }
-    
-    logger.debug(f"Term sheet info: {term_sheet_info}")
-    logger.debug(f"Master sheet info: {master_sheet_info}")
+    term_sheet_info = handle_input_file(term_sheet, 'term sheet')
+    try:
+        master_sheet_info = handle_input_file(master_sheet, 'master sheet')
+    except Exception:
+        # Don't leave the saved term sheet behind when the request fails
+        cleanup_temp_files([term_sheet_info['path']])
+        raise
     
     return term_sheet_info, master_sheet_info
 
+def handle_batch_input_files(term_sheets: List[BinaryIO], master_sheet: BinaryIO) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Process several uploaded term sheets validated against one master sheet.
+    Returns metadata for each term sheet and for the master sheet.
+    """
+    term_sheet_infos = []
+    try:
+        for term_sheet in term_sheets:
+            term_sheet_infos.append(handle_input_file(term_sheet, 'term sheet'))
+        master_sheet_info = handle_input_file(master_sheet, 'master sheet')
+    except Exception:
+        # Don't leave the files saved so far behind when the request fails
+        cleanup_temp_files([info['path'] for info in term_sheet_infos])
+        raise
+    
+    return term_sheet_infos, master_sheet_info
+
 def cleanup_temp_files(file_paths: list) -> None:
     """Remove temporary files after processing."""
     for path in file_paths:
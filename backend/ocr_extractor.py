@@ -4,14 +4,19 @@ from PIL import Image
 import pandas as pd
 import docx
 import PyPDF2
-import pdfplumber
+import fitz  # PyMuPDF
 import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Master sheet columns the validator reads
+MASTER_SHEET_COLUMNS = ('Term', 'Expected Value', 'Allowed Range')
+
 class DocumentExtractor:
     def __init__(self):
     # Initialize OCR engine
@@ -45,13 +50,17 @@ class DocumentExtractor:
         """Extract text from PDF files."""
         try:
             # First try to extract text directly (for digital PDFs)
-            with pdfplumber.open(file_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    page_text = page.extract_text()
+            with fitz.open(file_path) as pdf:
+                parts = []
+                for i, page in enumerate(pdf):
+                    page_text = page.get_text("text")
+                    # If the first page has no text, the PDF is most likely scanned
+                    if i == 0 and not (page_text and page_text.strip()):
+                        return self._ocr_pdf(file_path)
                     if page_text:
-                        text += page_text + "\n"
+                        parts.append(page_text + "\n")
                 
+                text = "".join(parts)
                 # If no text was extracted, the PDF might be scanned
                 if not text.strip():
                     return self._ocr_pdf(file_path)
@@ -65,11 +74,18 @@ class DocumentExtractor:
         """Perform OCR on PDF pages."""
         from pdf2image import convert_from_path
         
-        pages = convert_from_path(file_path, 300)
-        text = ""
-        for page in pages:
-            text += pytesseract.image_to_string(page) + "\n"
-        return text
+        with tempfile.TemporaryDirectory() as output_folder:
+            # Let poppler write the pages straight to disk and hand tesseract the
+            # file paths, so the images are never loaded or re-encoded by PIL.
+            # 200 DPI is plenty for text and keeps the images (and OCR work) smaller
+            page_paths = convert_from_path(file_path, 200, output_folder=output_folder,
+                                           paths_only=True, thread_count=4)
+            
+            # Each pytesseract call runs its own tesseract process, so pages can be
+            # OCR'd side by side from a thread pool
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+                texts = list(executor.map(pytesseract.image_to_string, page_paths))
+        return "".join(page_text + "\n" for page_text in texts)
     
     def _extract_from_word(self, file_path: str) -> str:
         """Extract text from Word documents."""
@@ -79,8 +95,11 @@ class DocumentExtractor:
     def _extract_from_excel(self, file_path: str) -> str:
         """Extract text from Excel files."""
         df = pd.read_excel(file_path)
-        # Convert DataFrame to string representation
-        return df.to_string()
+        # Dump the header and rows as space-separated lines; the text matching
+        # downstream doesn't need to_string()'s column alignment
+        lines = [' '.join(map(str, df.columns))]
+        lines.extend(' '.join(map(str, row)) for row in df.itertuples(index=False, name=None))
+        return '\n'.join(lines)
     
     def _extract_from_image(self, file_path: str) -> str:
         """Perform OCR on image files."""
@@ -96,6 +115,12 @@ class DocumentExtractor:
         file_path = file_info['path']
         
         if file_type == 'excel':
+            # Only the rule columns are used downstream, so skip parsing the rest when the
+            # sheet has a Term column. Values keep their native types, the number and date
+            # validators rely on them (a string "-0.25" would lose its sign)
+            df = pd.read_excel(file_path, usecols=lambda column: column in MASTER_SHEET_COLUMNS)
+            if 'Term' in df.columns:
+                return df
             return pd.read_excel(file_path)
         elif file_type == 'csv':
             return pd.read_csv(file_path)
@@ -0,0 +1,92 @@
+import os
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Tuple
+
+from ocr_extractor import DocumentExtractor
+from data_structurer import DataStructurer
+from validator import TermValidator
+from reporter import ValidationReporter, count_statuses
+
+# Created once at import (i.e. at server startup) and shared by every request,
+# so no request pays for loading the spaCy model or setting up tesseract
+DOC_EXTRACTOR = DocumentExtractor()
+DATA_STRUCTURER = DataStructurer()
+VALIDATOR = TermValidator()
+REPORTER = ValidationReporter()
+
+def df_to_records(df: pd.DataFrame) -> list:
+    """Convert a DataFrame to a list of row dicts, faster than to_dict(orient='records')."""
+    columns = df.columns.tolist()
+    values = [df.iloc[:, i].tolist() for i in range(len(columns))]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+def summarize_results(validation_results: pd.DataFrame) -> dict:
+    """Calculate summary statistics for a validation results DataFrame."""
+    counts = count_statuses(validation_results)
+    total_terms = counts['total']
+    valid_terms = counts['valid']
+    invalid_terms = counts['invalid']
+    unknown_terms = counts['unknown']
+
+    return {
+        'totalTerms': total_terms,
+        'validTerms': valid_terms,
+        'invalidTerms': invalid_terms,
+        'unknownTerms': unknown_terms,
+        'validPercent': (valid_terms/total_terms*100) if total_terms > 0 else 0,
+        'invalidPercent': (invalid_terms/total_terms*100) if total_terms > 0 else 0,
+        'unknownPercent': (unknown_terms/total_terms*100) if total_terms > 0 else 0
+    }
+
+def run_validation(term_sheet_info: Dict[str, Any], master_sheet_info: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run the full validation pipeline on a saved term sheet and master sheet.
+    Returns the JSON response body and the paths of the generated report files.
+    """
+    # Extract text from the documents
+    term_sheet_text = DOC_EXTRACTOR.extract_text(term_sheet_info)
+    master_df = DOC_EXTRACTOR.extract_master_sheet_structure(master_sheet_info)
+
+    # Structure the extracted term sheet data
+    extracted_terms = DATA_STRUCTURER.structure_data(term_sheet_text)
+
+    # Normalize terms to match master sheet terminology
+    normalized_terms = DATA_STRUCTURER.normalize_terms(extracted_terms, master_df)
+
+    # Validate terms against master sheet
+    validation_results = VALIDATOR.validate_terms(normalized_terms, master_df)
+
+    # Convert DataFrame to JSON
+    master_sheet_json = df_to_records(master_df)
+    validation_results_json = df_to_records(validation_results)
+
+    # Generate PDF and Excel reports in the background, they don't share any state
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pdf_future = executor.submit(REPORTER.generate_pdf_report, validation_results, term_sheet_info, master_sheet_info)
+        excel_future = executor.submit(REPORTER.generate_excel_report, validation_results, term_sheet_info, master_sheet_info)
+
+        # HTML report is built on this thread meanwhile
+        html_report = REPORTER.generate_html_report(validation_results, term_sheet_info, master_sheet_info)
+
+        pdf_path = pdf_future.result()
+        excel_path = excel_future.result()
+
+    response = {
+        'success': True,
+        'masterSheetData': master_sheet_json,
+        'extractedTerms': extracted_terms,
+        'validationResults': validation_results_json,
+        'summary': summarize_results(validation_results),
+        'extractedText': term_sheet_text[:5000] + ("..." if len(term_sheet_text) > 5000 else ""),
+        'pdfReport': os.path.basename(pdf_path),
+        'excelReport': os.path.basename(excel_path),
+        'htmlReport': html_report
+    }
+
+    report_files = {
+        'pdf': pdf_path,
+        'excel': excel_path
+    }
+
+    return response, report_files
@@ -2,14 +2,62 @@ import matplotlib
 matplotlib.use('Agg') 
 
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
 import io
+import importlib.util
+from html import escape
+from functools import lru_cache
 from typing import Dict, Any, List
-import base64
-from fpdf import FPDF
+from fpdf import FPDF, XPos, YPos
+from fpdf.fonts import FontFace
 import os
+import uuid
 from datetime import datetime
 
+# ASCII stand-ins for the status symbols, which the PDF and Excel reports can't show
+_ASCII_STATUS = {
+    '✅': 'PASS',
+    '❌': 'FAIL',
+    '❓': 'UNKNOWN'
+}
+
+# Checked once at import, openpyxl is only used when xlsxwriter isn't installed
+_EXCEL_ENGINE = 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') else 'openpyxl'
+
+def count_statuses(validation_results: pd.DataFrame) -> Dict[str, int]:
+    """Count the terms by status in a single pass over the Status column."""
+    counts = validation_results['Status'].value_counts()
+    return {
+        'total': len(validation_results),
+        'valid': int(counts.get('✅', 0)),
+        'invalid': int(counts.get('❌', 0)),
+        'unknown': int(counts.get('❓', 0))
+    }
+
+@lru_cache(maxsize=64)
+def _render_summary_chart(valid_terms: int, invalid_terms: int, unknown_terms: int) -> str:
+    """
+    Render the summary pie chart as inline SVG markup.
+    Cached on the counts since the same counts always give the same chart.
+    """
+    # A standalone Figure (not pyplot) so concurrent requests don't share state
+    fig = Figure(figsize=(8, 5))
+    ax = fig.subplots()
+    labels = ['Valid', 'Invalid', 'Unknown']
+    sizes = [valid_terms, invalid_terms, unknown_terms]
+    colors = ['#4CAF50', '#F44336', '#FFC107']
+    ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')
+    ax.set_title('Term Validation Results')
+    
+    # SVG can go straight into the HTML, no rasterizing or base64 encoding needed
+    buf = io.StringIO()
+    fig.savefig(buf, format='svg')
+    svg = buf.getvalue()
+    # Drop the XML prolog, only the <svg> element belongs inline
+    return svg[svg.index('<svg'):]
+
 class ValidationReporter:
     def __init__(self):
         pass
@@ -21,35 +69,33 @@ class ValidationReporter:
         Generate an HTML validation report.
         """
         # Calculate summary statistics
-        total_terms = len(validation_results)
-        valid_terms = len(validation_results[validation_results['Status'] == '✅'])
-        invalid_terms = len(validation_results[validation_results['Status'] == '❌'])
-        unknown_terms = len(validation_results[validation_results['Status'] == '❓'])
+        summary = count_statuses(validation_results)
+        total_terms = summary['total']
+        valid_terms = summary['valid']
+        invalid_terms = summary['invalid']
+        unknown_terms = summary['unknown']
         
         # Create summary chart
-        plt.figure(figsize=(8, 5))
-        labels = ['Valid', 'Invalid', 'Unknown']
-        sizes = [valid_terms, invalid_terms, unknown_terms]
-        colors = ['#4CAF50', '#F44336', '#FFC107']
-        plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-        plt.axis('equal')
-        plt.title('Term Validation Results')
+        chart_svg = _render_summary_chart(valid_terms, invalid_terms, unknown_terms)
         
-        # Save chart to bytes
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        chart_img = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close('all')
-        
-        # Style the results table with colors based on status
-        styled_results = validation_results.style.apply(
-            lambda row: ['background-color: #E8F5E9' if cell == '✅' else
-                         'background-color: #FFEBEE' if cell == '❌' else
-                         'background-color: #FFF8E1' if cell == '❓' else ''
-                         for cell in row], 
-            axis=1, subset=['Status']
+        # Build the results table directly, pandas' Styler is slow on large tables.
+        # Status cells get a class for their color, computed for the whole column at once
+        status = validation_results['Status'].to_numpy()
+        status_classes = np.select(
+            [status == '✅', status == '❌', status == '❓'],
+            ['status-valid', 'status-invalid', 'status-unknown'],
+            default=''
         )
+        column_cells = []
+        for column in validation_results.columns:
+            values = map(escape, validation_results[column].astype(str))
+            if column == 'Status':
+                column_cells.append([f'<td class="{css_class}">{value}</td>' for css_class, value in zip(status_classes, values)])
+            else:
+                column_cells.append([f'<td>{value}</td>' for value in values])
+        header_row = ''.join(f'<th>{escape(str(column))}</th>' for column in validation_results.columns)
+        body_rows = '\n'.join(f"<tr>{''.join(row)}</tr>" for row in zip(*column_cells))
+        results_table = f"<table>\n<thead><tr>{header_row}</tr></thead>\n<tbody>\n{body_rows}\n</tbody>\n</table>"
         
         # Generate HTML report
         html = f"""
@@ -69,6 +115,9 @@ class ValidationReporter:
                 .valid {{ color: green; }}
                 .invalid {{ color: red; }}
                 .unknown {{ color: orange; }}
+                .status-valid {{ background-color: #E8F5E9; }}
+                .status-invalid {{ background-color: #FFEBEE; }}
+                .status-unknown {{ background-color: #FFF8E1; }}
             </style>
         </head>
         <body>
@@ -90,11 +139,11 @@ class ValidationReporter:
             
             <div class="chart">
                 <h2>Validation Chart</h2>
-                <img src="data:image/png;base64,{chart_img}" alt="Validation Results Chart">
+                <div>{chart_svg}</div>
             </div>
             
             <h2>Detailed Results</h2>
-            {styled_results.to_html()}
+            {results_table}
         </body>
         </html>
         """
@@ -107,76 +156,67 @@ class ValidationReporter:
         """
         Generate a PDF validation report and return the file path.
         """
-        # Create a copy of validation results to avoid modifying the original
-        pdf_results = validation_results.copy()
-        
-        # Replace Unicode symbols with ASCII alternatives
-        pdf_results['Status'] = pdf_results['Status'].replace({
-            '✅': 'PASS',
-            '❌': 'FAIL',
-            '❓': 'UNKNOWN'
-        })
-        
         # Create a PDF document
         pdf = FPDF()
         pdf.add_page()
         
         # Set font
-        pdf.set_font('Arial', 'B', 16)
-        pdf.cell(0, 10, 'Term Sheet Validation Report', 0, 1, 'C')
+        pdf.set_font('Helvetica', 'B', 16)
+        pdf.cell(0, 10, 'Term Sheet Validation Report', align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         
         # File information
-        pdf.set_font('Arial', '', 12)
-        pdf.cell(0, 10, f"Term Sheet: {term_sheet_info.get('filename', 'Unknown')}", 0, 1)
-        pdf.cell(0, 10, f"Master Sheet: {master_sheet_info.get('filename', 'Unknown')}", 0, 1)
-        pdf.cell(0, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 0, 1)
+        pdf.set_font('Helvetica', '', 12)
+        pdf.cell(0, 10, f"Term Sheet: {term_sheet_info.get('filename', 'Unknown')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 10, f"Master Sheet: {master_sheet_info.get('filename', 'Unknown')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         
         # Summary statistics
-        total_terms = len(pdf_results)
-        valid_terms = len(validation_results[validation_results['Status'] == '✅'])
-        invalid_terms = len(validation_results[validation_results['Status'] == '❌'])
-        unknown_terms = len(validation_results[validation_results['Status'] == '❓'])
+        summary = count_statuses(validation_results)
+        total_terms = summary['total']
+        valid_terms = summary['valid']
+        invalid_terms = summary['invalid']
+        unknown_terms = summary['unknown']
         
         pdf.ln(10)
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Validation Summary', 0, 1)
-        pdf.set_font('Arial', '', 12)
-        pdf.cell(0, 10, f"Total Terms: {total_terms}", 0, 1)
-        pdf.cell(0, 10, f"Valid Terms: {valid_terms} ({valid_terms/total_terms*100:.1f}%)", 0, 1)
-        pdf.cell(0, 10, f"Invalid Terms: {invalid_terms} ({invalid_terms/total_terms*100:.1f}%)", 0, 1)
-        pdf.cell(0, 10, f"Unknown Terms: {unknown_terms} ({unknown_terms/total_terms*100:.1f}%)", 0, 1)
+        pdf.set_font('Helvetica', 'B', 14)
+        pdf.cell(0, 10, 'Validation Summary', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font('Helvetica', '', 12)
+        pdf.cell(0, 10, f"Total Terms: {total_terms}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 10, f"Valid Terms: {valid_terms} ({valid_terms/total_terms*100:.1f}%)", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 10, f"Invalid Terms: {invalid_terms} ({invalid_terms/total_terms*100:.1f}%)", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 10, f"Unknown Terms: {unknown_terms} ({unknown_terms/total_terms*100:.1f}%)", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         
         # Add detailed results table
         pdf.ln(10)
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Detailed Results', 0, 1)
+        pdf.set_font('Helvetica', 'B', 14)
+        pdf.cell(0, 10, 'Detailed Results', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         
         # Define table columns and widths
         columns = ['Term', 'Extracted Value', 'Status', 'Expected Value', 'Notes']
         col_widths = [40, 35, 15, 35, 65]
         
-        # Create table header
-        pdf.set_font('Arial', 'B', 10)
-        for i, col in enumerate(columns):
-            pdf.cell(col_widths[i], 10, col, 1)
-        pdf.ln()
+        # Build the cell text a whole column at a time, only the table columns are copied
+        table_data = validation_results[columns].astype(str)
+        # Replace Unicode symbols with ASCII alternatives
+        table_data['Status'] = table_data['Status'].replace(_ASCII_STATUS)
+        table_data['Term'] = table_data['Term'].str.slice(0, 25)
+        table_data['Extracted Value'] = table_data['Extracted Value'].str.slice(0, 20)
+        table_data['Expected Value'] = table_data['Expected Value'].str.slice(0, 20)
+        # Make sure notes don't contain Unicode characters
+        table_data['Notes'] = (table_data['Notes'].str.slice(0, 40)
+                               .str.encode('latin-1', errors='replace')
+                               .str.decode('latin-1'))
         
-        # Add table data
-        pdf.set_font('Arial', '', 8)
-        for _, row in pdf_results.iterrows():
-            pdf.cell(col_widths[0], 10, str(row['Term'])[:25], 1)
-            pdf.cell(col_widths[1], 10, str(row['Extracted Value'])[:20], 1)
-            pdf.cell(col_widths[2], 10, str(row['Status']), 1)
-            pdf.cell(col_widths[3], 10, str(row['Expected Value'])[:20], 1)
-            
-            # Make sure notes don't contain Unicode characters
-            notes = str(row['Notes'])[:40]
-            notes = notes.encode('latin-1', errors='replace').decode('latin-1')
-            pdf.cell(col_widths[4], 10, notes, 1)
-            pdf.ln()
+        # Add the table, fpdf2 lays out all rows in one pass instead of cell by cell
+        pdf.set_font('Helvetica', '', 8)
+        with pdf.table(col_widths=col_widths, width=sum(col_widths), text_align='LEFT', line_height=10,
+                       headings_style=FontFace(emphasis='BOLD', size_pt=10)) as table:
+            table.row(columns)
+            for row in table_data.itertuples(index=False, name=None):
+                table.row(row)
         
         # Save the PDF to a temporary file
-        output_path = f"validation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        output_path = f"validation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.pdf"
         pdf.output(output_path)
         
         return output_path
@@ -189,81 +229,17 @@ class ValidationReporter:
             """
             Generate an Excel validation report and return the file path.
             """
-            # Create a copy of validation results with ASCII replacements for Excel
-            excel_results = validation_results.copy()
-            excel_results['Status'] = excel_results['Status'].replace({
-                '✅': 'PASS',
-                '❌': 'FAIL',
-                '❓': 'UNKNOWN'
-            })
-            
-            # Create a Pandas Excel writer
-            output_path = f"validation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            
-            try:
-                writer = pd.ExcelWriter(output_path, engine='xlsxwriter')
-            except Exception as e:
-                print(f"Error creating Excel writer: {e}")
-                # Fallback to using openpyxl engine
-                writer = pd.ExcelWriter(output_path, engine='openpyxl')
+            # ASCII replacements for Excel; the shallow copy shares every column but Status
+            excel_results = validation_results.copy(deep=False)
+            excel_results['Status'] = excel_results['Status'].replace(_ASCII_STATUS)
             
-            # Write the validation results to the Excel file
-            excel_results.to_excel(writer, sheet_name='Validation Results', index=False)
-            
-            try:
-                # Access the workbook and worksheet objects
-                workbook = writer.book
-                worksheet = writer.sheets['Validation Results']
-                
-                # Define formats
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'bg_color': '#D9D9D9',
-                    'border': 1
-                })
-                
-                valid_format = workbook.add_format({
-                    'bg_color': '#E8F5E9',
-                    'border': 1
-                })
-                
-                invalid_format = workbook.add_format({
-                    'bg_color': '#FFEBEE',
-                    'border': 1
-                })
-                
-                unknown_format = workbook.add_format({
-                    'bg_color': '#FFF8E1',
-                    'border': 1
-                })
-                
-                # Apply formats to the header row
-                for col_num, value in enumerate(excel_results.columns.values):
-                    worksheet.write(0, col_num, value, header_format)
-                
-                # Apply conditional formatting based on Status
-                status_col = excel_results.columns.get_loc('Status')
-                for row_num in range(1, len(excel_results) + 1):
-                    orig_status = validation_results.iloc[row_num - 1]['Status']
-                    status = excel_results.iloc[row_num - 1]['Status']
-                    if orig_status == '✅':
-                        worksheet.write(row_num, status_col, status, valid_format)
-                    elif orig_status == '❌':
-                        worksheet.write(row_num, status_col, status, invalid_format)
-                    elif orig_status == '❓':
-                        worksheet.write(row_num, status_col, status, unknown_format)
-            except Exception as e:
-                print(f"Error formatting Excel worksheet: {e}")
+            output_path = f"validation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.xlsx"
             
             # Add a summary sheet
+            summary = count_statuses(validation_results)
             summary_data = {
                 'Metric': ['Total Terms', 'Valid Terms', 'Invalid Terms', 'Unknown Terms'],
-                'Value': [
-                    len(validation_results),
-                    len(validation_results[validation_results['Status'] == '✅']),
-                    len(validation_results[validation_results['Status'] == '❌']),
-                    len(validation_results[validation_results['Status'] == '❓'])
-                ]
+                'Value': [summary['total'], summary['valid'], summary['invalid'], summary['unknown']]
             }
             
             # Add file information
@@ -276,17 +252,65 @@ class ValidationReporter:
                 ]
             }
             
-            # Write summary information
-            pd.DataFrame(file_info).to_excel(writer, sheet_name='Summary', startrow=0, index=False)
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', startrow=5, index=False)
-            
-            # Save the Excel file
-            try:
-                writer.save()
-            except Exception as e:
-                print(f"Error saving Excel file: {e}")
-                # If workbook can't be saved properly, create a simpler version
-                with pd.ExcelWriter(output_path, engine='openpyxl') as simple_writer:
-                    excel_results.to_excel(simple_writer, sheet_name='Results', index=False)
+            # Write every sheet through one Pandas Excel writer, the file is saved once on exit
+            with pd.ExcelWriter(output_path, engine=_EXCEL_ENGINE) as writer:
+                # Write the validation results to the Excel file
+                excel_results.to_excel(writer, sheet_name='Validation Results', index=False)
+                
+                # The formats use the xlsxwriter API
+                if _EXCEL_ENGINE == 'xlsxwriter':
+                    try:
+                        self._apply_formats(writer, excel_results)
+                    except Exception as e:
+                        print(f"Error formatting Excel worksheet: {e}")
+                
+                # Write summary information
+                pd.DataFrame(file_info).to_excel(writer, sheet_name='Summary', startrow=0, index=False)
+                pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', startrow=5, index=False)
             
-            return output_path
\ No newline at end of file
+            return output_path
+    
+    def _apply_formats(self, writer: pd.ExcelWriter, excel_results: pd.DataFrame) -> None:
+        """Style the header row and color the Status cells of the results sheet."""
+        # Access the workbook and worksheet objects
+        workbook = writer.book
+        worksheet = writer.sheets['Validation Results']
+        
+        # Define formats
+        header_format = workbook.add_format({
+            'bold': True,
+            'bg_color': '#D9D9D9',
+            'border': 1
+        })
+        
+        valid_format = workbook.add_format({
+            'bg_color': '#E8F5E9',
+            'border': 1
+        })
+        
+        invalid_format = workbook.add_format({
+            'bg_color': '#FFEBEE',
+            'border': 1
+        })
+        
+        unknown_format = workbook.add_format({
+            'bg_color': '#FFF8E1',
+            'border': 1
+        })
+        
+        # Apply formats to the header row
+        for col_num, value in enumerate(excel_results.columns.values):
+            worksheet.write(0, col_num, value, header_format)
+        
+        # Apply conditional formatting based on Status, Excel colors the cells itself
+        # so there is one rule per status rather than a write per row
+        status_col = excel_results.columns.get_loc('Status')
+        last_row = len(excel_results)
+        status_formats = {'PASS': valid_format, 'FAIL': invalid_format, 'UNKNOWN': unknown_format}
+        for status, status_format in status_formats.items():
+            worksheet.conditional_format(1, status_col, last_row, status_col, {
+                'type': 'cell',
+                'criteria': '==',
+                'value': f'"{status}"',
+                'format': status_format
+            })
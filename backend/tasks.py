@@ -0,0 +1,28 @@
+import os
+from celery import Celery
+from typing import Dict, Any
+
+from input_handler import cleanup_temp_files
+from pipeline import run_validation
+
+# Start a worker from the backend folder with: celery -A tasks worker
+celery = Celery(
+    'termsheet',
+    broker=os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
+    backend=os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+)
+
+@celery.task
+def validate_task(term_sheet_info: Dict[str, Any], master_sheet_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the validation pipeline outside the request handler.
+    The uploaded files must be on a filesystem the worker can read.
+    """
+    try:
+        response, report_files = run_validation(term_sheet_info, master_sheet_info)
+        return {
+            'response': response,
+            'reportFiles': report_files
+        }
+    finally:
+        cleanup_temp_files([term_sheet_info['path'], master_sheet_info['path']])
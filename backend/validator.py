@@ -1,72 +1,160 @@
+import os
+import multiprocessing
 import pandas as pd
 import re
-import dateparser
-from typing import Dict, Any, List, Tuple
+from dateparser.date import DateDataParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from dateutil.parser import parse as date_parse
+from rapidfuzz import fuzz
 import numpy as np
 
+# Compiled once instead of on every value
+_NON_NUMERIC = re.compile(r'[^0-9\.]')
+_CURRENCY_SYMBOLS = re.compile(r'[%$£€,]')
+_HAS_DIGIT = re.compile(r'\d')
+
+# Common term sheet date formats, recognised without running a date parser:
+# 2027-01-01, 2027/1/1, 01/05/2026, 1-5-26, Jan 5, 2026, 5th January 2026
+_MONTH_NAME = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+_DATE_FASTPATH = re.compile(
+    r'^(?:\d{4}[-/.]\d{1,2}[-/.]\d{1,2}'
+    r'|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}'
+    rf'|{_MONTH_NAME}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}'
+    rf'|\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTH_NAME},?\s+\d{{4}})$',
+    re.IGNORECASE
+)
+_HAS_MONTH_NAME = re.compile(rf'\b{_MONTH_NAME}', re.IGNORECASE)
+
+# One English-only parser shared by every call, dateparser.parse would otherwise
+# try to detect the language of each value
+_DATE_PARSER = DateDataParser(languages=['en'])
+
+def _parse_date(value_str: str):
+    """Parse a date string, returns None if it can't be parsed."""
+    return _DATE_PARSER.get_date_data(value_str).date_obj
+
+def _to_number(value_str: str) -> float:
+    """Parse a number, ignoring any characters except digits and the decimal point."""
+    return float(_NON_NUMERIC.sub('', value_str))
+
+def _split_range(range_str: str) -> Optional[List[str]]:
+    """Split a range like "4.5%–6.0%" or "100-200" into its two ends."""
+    delimiter = '–' if '–' in range_str else '-'
+    parts = range_str.split(delimiter)
+    return parts if len(parts) == 2 else None
+
+# The same allowed range applies to every value of a term, so parse each rule once
+@lru_cache(maxsize=1024)
+def _parse_numeric_range(range_str: str) -> Optional[Tuple]:
+    """
+    Parse a numeric allowed range into ('ge', min), ('le', max) or
+    ('between', min, max). Returns None if the rule isn't a range.
+    """
+    if range_str.startswith('≥'):
+        return ('ge', _to_number(range_str[1:]))
+    elif range_str.startswith('≤'):
+        return ('le', _to_number(range_str[1:]))
+    elif '–' in range_str or '-' in range_str:
+        parts = _split_range(range_str)
+        if parts:
+            return ('between', _to_number(parts[0]), _to_number(parts[1]))
+    return None
+
+@lru_cache(maxsize=1024)
+def _parse_date_range(range_str: str) -> Optional[Tuple]:
+    """
+    Parse a date allowed range into ('ge', min), ('le', max) or
+    ('between', min, max). Returns None if the rule isn't a range.
+    """
+    if range_str.startswith('≥'):
+        return ('ge', _parse_date(range_str[1:]))
+    elif range_str.startswith('≤'):
+        return ('le', _parse_date(range_str[1:]))
+    elif '–' in range_str or '-' in range_str:
+        parts = _split_range(range_str)
+        if parts:
+            return ('between', _parse_date(parts[0].strip()), _parse_date(parts[1].strip()))
+    return None
+
+# Below this many terms a process pool costs more to start than it saves
+_PARALLEL_MIN_TERMS = 1000
+
+def _rule_key(value: Any) -> Any:
+    """Map missing rule values to None, NaN never compares equal so it can't be a cache key."""
+    return None if pd.isna(value) else value
+
 class TermValidator:
     def __init__(self):
-        pass
+        # Repeated term/value/rule combinations are validated once per validator
+        self._validate_value_cached = lru_cache(maxsize=4096, typed=True)(self._validate_value)
     
     def validate_terms(self, extracted_terms: Dict[str, Any], master_df: pd.DataFrame) -> pd.DataFrame:
         """
         Validate extracted terms against the master sheet rules.
         Returns a DataFrame with validation results.
         """
-        results = []
+        # One rule row per master term, in first-seen order; like a dict build,
+        # the last duplicate's values win
+        rule_columns = ['Expected Value', 'Allowed Range']
+        master_rules = master_df.drop_duplicates('Term', keep='last').set_index('Term')
+        master_rules = master_rules.reindex(master_df['Term'].drop_duplicates())
+        for column in rule_columns:
+            if column not in master_rules.columns:
+                master_rules[column] = None
         
-        master_dict = {}
-        for _, row in master_df.iterrows():
-            term = row['Term']
-            master_dict[term] = {
-                'Expected Value': row['Expected Value'] if 'Expected Value' in row else None,
-                'Allowed Range': row['Allowed Range'] if 'Allowed Range' in row else None
-            }
+        extracted = pd.DataFrame({
+            'Term': list(extracted_terms.keys()),
+            'Extracted Value': list(extracted_terms.values())
+        })
+        
+        # Which terms are on both sides, from set operations on the keys
+        master_terms = set(master_rules.index)
+        missing_terms = master_terms - extracted_terms.keys()
+        in_master = np.array([term in master_terms for term in extracted_terms], dtype=bool)
         
-        # Validate each extracted term
-        for term, extracted_value in extracted_terms.items():
-            result = {
-                'Term': term,
-                'Extracted Value': extracted_value,
+        # Join the rules onto the extracted terms by looking them up in the index
+        rules = master_rules.reindex(extracted['Term'])[rule_columns].reset_index(drop=True)
+        
+        results = extracted.assign(
+            **{
                 'Status': '❓',  # Default unknown
-                'Expected Value': 'N/A',
-                'Allowed Range': 'N/A',
-                'Notes': ''
+                'Expected Value': rules['Expected Value'].where(in_master, 'N/A'),
+                'Allowed Range': rules['Allowed Range'].where(in_master, 'N/A'),
+                'Notes': 'Term not found in master sheet'
             }
-            
-            # Check if term exists in master sheet
-            if term in master_dict:
-                result['Expected Value'] = master_dict[term]['Expected Value']
-                result['Allowed Range'] = master_dict[term]['Allowed Range']
-                
-                # Validate the term
-                is_valid, notes = self._validate_value(
-                    extracted_value, 
-                    master_dict[term]['Expected Value'],
-                    master_dict[term]['Allowed Range']
-                )
-                
-                result['Status'] = '✅' if is_valid else '❌'
-                result['Notes'] = notes
-            else:
-                result['Notes'] = 'Term not found in master sheet'
-                
-            results.append(result)
+        )
+        
+        # Validate each extracted term that has a rule
+        matched = results[in_master]
+        rows = [
+            (str(extracted_value), _rule_key(expected_value), _rule_key(allowed_range))
+            for extracted_value, expected_value, allowed_range in zip(
+                matched['Extracted Value'], matched['Expected Value'], matched['Allowed Range']
+            )
+        ]
+        # Daemonic processes (e.g. Celery prefork workers) can't start a pool of their own
+        if len(rows) < _PARALLEL_MIN_TERMS or multiprocessing.current_process().daemon:
+            outcomes = [self._validate_value_cached(*row) for row in rows]
+        else:
+            outcomes = _validate_parallel(rows)
+        results.loc[in_master, 'Status'] = ['✅' if is_valid else '❌' for is_valid, _ in outcomes]
+        results.loc[in_master, 'Notes'] = [notes for _, notes in outcomes]
         
         # Check for missing terms from master sheet
-        for term in master_dict:
-            if term not in extracted_terms:
-                results.append({
-                    'Term': term,
-                    'Extracted Value': 'Missing',
-                    'Status': '❌',
-                    'Expected Value': master_dict[term]['Expected Value'],
-                    'Allowed Range': master_dict[term]['Allowed Range'],
-                    'Notes': 'Term not found in document'
-                })
+        # A boolean array, an empty plain list would select zero columns instead of zero rows
+        missing = master_rules[np.array([term in missing_terms for term in master_rules.index], dtype=bool)]
+        missing_results = pd.DataFrame({
+            'Term': missing.index,
+            'Extracted Value': 'Missing',
+            'Status': '❌',
+            'Expected Value': missing['Expected Value'].to_numpy(),
+            'Allowed Range': missing['Allowed Range'].to_numpy(),
+            'Notes': 'Term not found in document'
+        })
         
-        return pd.DataFrame(results)
+        return pd.concat([results, missing_results], ignore_index=True)
     
     def _validate_value(self, extracted_value: str, expected_value: Any, allowed_range: Any) -> Tuple[bool, str]:
         """
@@ -91,20 +179,26 @@ class TermValidator:
     
     def _determine_value_type(self, value_str: str) -> str:
         """Determine if a value is a date, number, or text."""
-        # Check if it's a date
-        try:
-            date_parse(value_str)
+        # Check the common date formats first
+        if _DATE_FASTPATH.match(value_str):
             return 'date'
-        except:
-            pass
         
         # Check if it's a number (possibly with % or currency symbols)
-        numeric_str = re.sub(r'[%$£€,]', '', value_str)
-        try:
-            float(numeric_str)
-            return 'number'
-        except:
-            pass
+        numeric_str = _CURRENCY_SYMBOLS.sub('', value_str)
+        if _HAS_DIGIT.search(numeric_str):
+            try:
+                float(numeric_str)
+                return 'number'
+            except:
+                pass
+        
+        # Any other date needs a month name, only then run the full parser
+        if _HAS_MONTH_NAME.search(value_str):
+            try:
+                date_parse(value_str)
+                return 'date'
+            except:
+                pass
         
         # Default to text
         return 'text'
@@ -112,35 +206,34 @@ class TermValidator:
     def _validate_date(self, extracted_str: str, expected_value: Any, allowed_range: Any) -> Tuple[bool, str]:
         """Validate a date value."""
         try:
-            extracted_date = dateparser.parse(extracted_str)
+            extracted_date = _parse_date(extracted_str)
             
             if pd.notna(expected_value):
-                expected_date = dateparser.parse(str(expected_value))
+                expected_date = _parse_date(str(expected_value))
                 if extracted_date == expected_date:
                     return True, "Date matches expected value"
+                # With no allowed range to fall back on, the mismatch decides it
+                if pd.isna(allowed_range):
+                    return False, f"Date {extracted_date.strftime('%Y-%m-%d')} doesn't match expected {expected_value}"
                 
             if pd.notna(allowed_range):
-                # Handle date range patterns like "≥2024-01-01"
-                range_str = str(allowed_range)
-                if range_str.startswith('≥'):
-                    min_date = dateparser.parse(range_str[1:])
-                    if extracted_date >= min_date:
-                        return True, f"Date is after minimum {min_date.strftime('%Y-%m-%d')}"
-                    else:
-                        return False, f"Date is before minimum {min_date.strftime('%Y-%m-%d')}"
-                elif range_str.startswith('≤'):
-                    max_date = dateparser.parse(range_str[1:])
-                    if extracted_date <= max_date:
-                        return True, f"Date is before maximum {max_date.strftime('%Y-%m-%d')}"
+                # Handle date range patterns like "≥2024-01-01" or "2023-01-01 – 2025-12-31"
+                bounds = _parse_date_range(str(allowed_range))
+                if bounds is not None:
+                    if bounds[0] == 'ge':
+                        min_date = bounds[1]
+                        if extracted_date >= min_date:
+                            return True, f"Date is after minimum {min_date.strftime('%Y-%m-%d')}"
+                        else:
+                            return False, f"Date is before minimum {min_date.strftime('%Y-%m-%d')}"
+                    elif bounds[0] == 'le':
+                        max_date = bounds[1]
+                        if extracted_date <= max_date:
+                            return True, f"Date is before maximum {max_date.strftime('%Y-%m-%d')}"
+                        else:
+                            return False, f"Date is after maximum {max_date.strftime('%Y-%m-%d')}"
                     else:
-                        return False, f"Date is after maximum {max_date.strftime('%Y-%m-%d')}"
-                elif '–' in range_str or '-' in range_str:
-                    # Handle date ranges like "2023-01-01 – 2025-12-31"
-                    delimiter = '–' if '–' in range_str else '-'
-                    parts = range_str.split(delimiter)
-                    if len(parts) == 2:
-                        min_date = dateparser.parse(parts[0].strip())
-                        max_date = dateparser.parse(parts[1].strip())
+                        _, min_date, max_date = bounds
                         if min_date <= extracted_date <= max_date:
                             return True, f"Date is within range {min_date.strftime('%Y-%m-%d')} to {max_date.strftime('%Y-%m-%d')}"
                         else:
@@ -159,8 +252,7 @@ class TermValidator:
         """Validate a numeric value."""
         try:
             # Remove any non-numeric characters except decimal point
-            numeric_str = re.sub(r'[^0-9\.]', '', extracted_str.replace(',', ''))
-            extracted_num = float(numeric_str)
+            extracted_num = _to_number(extracted_str)
             
             # Handle percentage values (if % symbol is present)
             is_percentage = '%' in extracted_str
@@ -168,35 +260,34 @@ class TermValidator:
             if pd.notna(expected_value):
                 # Clean expected value if it's a string
                 if isinstance(expected_value, str):
-                    expected_str = re.sub(r'[^0-9\.]', '', expected_value.replace(',', ''))
-                    expected_num = float(expected_str)
+                    expected_num = _to_number(expected_value)
                 else:
                     expected_num = float(expected_value)
                 
                 if np.isclose(extracted_num, expected_num, rtol=1e-5):
                     return True, "Number matches expected value"
+                # With no allowed range to fall back on, the mismatch decides it
+                if pd.isna(allowed_range):
+                    return False, f"Number {extracted_num} doesn't match expected {expected_value}"
             
             if pd.notna(allowed_range):
-                range_str = str(allowed_range)
-                if range_str.startswith('≥'):
-                    min_val = float(re.sub(r'[^0-9\.]', '', range_str[1:].replace(',', '')))
-                    if extracted_num >= min_val:
-                        return True, f"Number is greater than or equal to minimum {min_val}"
-                    else:
-                        return False, f"Number is below minimum {min_val}"
-                elif range_str.startswith('≤'):
-                    max_val = float(re.sub(r'[^0-9\.]', '', range_str[1:].replace(',', '')))
-                    if extracted_num <= max_val:
-                        return True, f"Number is less than or equal to maximum {max_val}"
+                # Handle ranges like "≥100", "≤5%", "4.5%–6.0%" or "100-200"
+                bounds = _parse_numeric_range(str(allowed_range))
+                if bounds is not None:
+                    if bounds[0] == 'ge':
+                        min_val = bounds[1]
+                        if extracted_num >= min_val:
+                            return True, f"Number is greater than or equal to minimum {min_val}"
+                        else:
+                            return False, f"Number is below minimum {min_val}"
+                    elif bounds[0] == 'le':
+                        max_val = bounds[1]
+                        if extracted_num <= max_val:
+                            return True, f"Number is less than or equal to maximum {max_val}"
+                        else:
+                            return False, f"Number is above maximum {max_val}"
                     else:
-                        return False, f"Number is above maximum {max_val}"
-                elif '–' in range_str or '-' in range_str:
-                    # Handle ranges like "4.5%–6.0%" or "100-200"
-                    delimiter = '–' if '–' in range_str else '-'
-                    parts = range_str.split(delimiter)
-                    if len(parts) == 2:
-                        min_val = float(re.sub(r'[^0-9\.]', '', parts[0].replace(',', '')))
-                        max_val = float(re.sub(r'[^0-9\.]', '', parts[1].replace(',', '')))
+                        _, min_val, max_val = bounds
                         if min_val <= extracted_num <= max_val:
                             return True, f"Number is within range {min_val} to {max_val}"
                         else:
@@ -220,9 +311,8 @@ class TermValidator:
             if extracted_str.lower() == expected_str.lower():
                 return True, "Text matches expected value"
             
-            # Fuzzy match
-            from fuzzywuzzy import fuzz
-            similarity = fuzz.ratio(extracted_str.lower(), expected_str.lower())
+            # Fuzzy match (rounded to a whole percentage like fuzzywuzzy did)
+            similarity = round(fuzz.ratio(extracted_str.lower(), expected_str.lower()))
             if similarity >= 90:  # 90% similarity threshold
                 return True, f"Text matches expected value with {similarity}% similarity"
             else:
@@ -239,4 +329,25 @@ class TermValidator:
                     return False, f"Text is not in list of allowed values: {', '.join(valid_values)}"
         
         # If no validation rules specified
-        return True, "No specific text validation rules"
\ No newline at end of file
+        return True, "No specific text validation rules"
+
+def _validate_chunk(rows: List[Tuple[str, Any, Any]]) -> List[Tuple[bool, str]]:
+    """Validate a chunk of (extracted, expected, allowed range) rows in a worker process."""
+    validator = TermValidator()
+    return [validator._validate_value_cached(*row) for row in rows]
+
+def _validate_parallel(rows: List[Tuple[str, Any, Any]]) -> List[Tuple[bool, str]]:
+    """
+    Validate rows across all CPU cores, returning the outcomes in order.
+    Each distinct row is only sent to the pool once.
+    """
+    unique_rows = list(dict.fromkeys(rows))
+    workers = os.cpu_count() or 1
+    chunk_size = -(-len(unique_rows) // workers)
+    chunks = [unique_rows[i:i + chunk_size] for i in range(0, len(unique_rows), chunk_size)]
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        outcomes = [outcome for chunk in executor.map(_validate_chunk, chunks) for outcome in chunk]
+    
+    by_row = dict(zip(unique_rows, outcomes))
+    return [by_row[row] for row in rows]
@@ -65,7 +65,7 @@ const handleValidate = async () => {
       setExtractedText(response.data.extractedText);
       
       // Update report URLs with the correct URL
-      const baseReportUrl = 'http://127.0.0.1:5000/api/download/';
+      const baseReportUrl = `http://127.0.0.1:5000/api/download/${response.data.reportId}/`;
       
       setReportUrls({
         pdf: `${baseReportUrl}pdf`,